@@ -1,9 +1,22 @@
 from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import json
+import time
 import uvicorn
 import os
-from chatbox import ArticleChatbot, list_available_articles
+from chatbox import (
+    ARTICLE_REFRESH_INTERVAL,
+    ArticleChatbot,
+    ArticleContext,
+    batcher,
+    init_clients,
+    list_available_articles,
+    refresh_article_cache,
+)
 
 # Get port from environment variable (Cloud Run sets this)
 PORT = int(os.getenv("PORT", 8080))
@@ -11,13 +24,88 @@ PORT = int(os.getenv("PORT", 8080))
 app = FastAPI(
     title="Article Chatbot API",
     description="API for chatting about articles",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
+async def _refresh_articles_every(interval: int):
+    """Keep the in-process article cache in sync with BigQuery."""
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.to_thread(refresh_article_cache)
+
+@app.on_event("startup")
+async def startup():
+    """Create the shared clients and mirror the article table in memory."""
+    await asyncio.to_thread(init_clients)
+    await asyncio.to_thread(refresh_article_cache)
+    app.state.article_refresh = asyncio.create_task(_refresh_articles_every(ARTICLE_REFRESH_INTERVAL))
+    batcher.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop the background tasks started at startup."""
+    app.state.article_refresh.cancel()
+    await batcher.stop()
+
+# Loaded articles, reused across requests: article_id -> (expires_at, context)
+CONTEXT_CACHE_MAXSIZE = 256
+CONTEXT_CACHE_TTL = 600  # seconds
+_context_cache: "OrderedDict[str, Tuple[float, ArticleContext]]" = OrderedDict()
+_context_locks: Dict[str, asyncio.Lock] = {}
+_context_lock_users: Dict[str, int] = {}  # requests holding or waiting on each lock
+
+def _get_cached_context(article_id: str) -> Optional[ArticleContext]:
+    """Return a fresh cached context and mark it as recently used."""
+    entry = _context_cache.get(article_id)
+    if entry is None:
+        return None
+
+    expires_at, context = entry
+    if expires_at < time.monotonic():
+        del _context_cache[article_id]
+        return None
+
+    _context_cache.move_to_end(article_id)
+    return context
+
+async def get_article_context(article_id: str) -> ArticleContext:
+    """Get the shared context for an article, loading it at most once at a time."""
+    context = _get_cached_context(article_id)
+    if context is not None:
+        return context
+
+    # The lock stays registered while anyone holds or waits on it, so a failed
+    # load is retried by one request at a time
+    lock = _context_locks.setdefault(article_id, asyncio.Lock())
+    _context_lock_users[article_id] = _context_lock_users.get(article_id, 0) + 1
+    try:
+        async with lock:
+            # Another request may have loaded it while we were waiting
+            context = _get_cached_context(article_id)
+            if context is None:
+                context = await ArticleContext.create(article_id)
+                _context_cache[article_id] = (time.monotonic() + CONTEXT_CACHE_TTL, context)
+                while len(_context_cache) > CONTEXT_CACHE_MAXSIZE:
+                    _context_cache.popitem(last=False)
+    finally:
+        _context_lock_users[article_id] -= 1
+        if not _context_lock_users[article_id]:
+            del _context_lock_users[article_id]
+            del _context_locks[article_id]
+    return context
+
+async def get_chatbot(article_id: str) -> ArticleChatbot:
+    """Create a per-request chatbot around the cached article context."""
+    context = await get_article_context(article_id)
+    return await ArticleChatbot.create(article_id, context=context)
+
 class ChatRequest(BaseModel):
     article_id: str
     question: str
 
+# The response models document the API schema; handlers return plain dicts so
+# responses skip Pydantic validation.
 class ChatResponse(BaseModel):
     success: bool
     data: Optional[Dict] = None
@@ -28,33 +116,33 @@ class ArticleResponse(BaseModel):
     data: Dict
     error: Optional[str] = None
 
-@app.get("/api/health", response_model=ChatResponse)
+@app.get("/api/health", responses={200: {"model": ChatResponse}})
 async def health_check():
     """Health check endpoint"""
-    return ChatResponse(
-        success=True,
-        data={"status": "healthy"}
-    )
+    return {
+        "success": True,
+        "data": {"status": "healthy"}
+    }
 
-@app.get("/api/chat", response_model=ChatResponse)
+@app.get("/api/chat", responses={200: {"model": ChatResponse}})
 async def chat_get(article_id: str = Query(..., description="The ID of the article"), 
                   question: str = Query(..., description="The question to ask about the article")):
     """Chat about an article using GET method"""
     try:
         # Initialize chatbot with the article
-        chatbot = ArticleChatbot(article_id=article_id)
+        chatbot = await get_chatbot(article_id)
         
         # Get response
-        response = chatbot.chat_with_article(question)
+        response = await chatbot.achat_with_article(question)
         
-        return ChatResponse(
-            success=True,
-            data={
+        return {
+            "success": True,
+            "data": {
                 "response": response,
                 "article_id": article_id,
                 "question": question
             }
-        )
+        }
         
     except Exception as e:
         raise HTTPException(
@@ -62,24 +150,24 @@ async def chat_get(article_id: str = Query(..., description="The ID of the artic
             detail=str(e)
         )
 
-@app.post("/api/chat", response_model=ChatResponse)
+@app.post("/api/chat", responses={200: {"model": ChatResponse}})
 async def chat_post(request: ChatRequest):
     """Chat about an article using POST method"""
     try:
         # Initialize chatbot with the article
-        chatbot = ArticleChatbot(article_id=request.article_id)
+        chatbot = await get_chatbot(request.article_id)
         
         # Get response
-        response = chatbot.chat_with_article(request.question)
+        response = await chatbot.achat_with_article(request.question)
         
-        return ChatResponse(
-            success=True,
-            data={
+        return {
+            "success": True,
+            "data": {
                 "response": response,
                 "article_id": request.article_id,
                 "question": request.question
             }
-        )
+        }
         
     except Exception as e:
         raise HTTPException(
@@ -87,22 +175,41 @@ async def chat_post(request: ChatRequest):
             detail=str(e)
         )
 
-@app.get("/api/articles", response_model=ArticleResponse)
+@app.post("/api/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Chat about an article, streaming the response as Server-Sent Events"""
+    try:
+        # Initialize chatbot with the article
+        chatbot = await get_chatbot(request.article_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=str(e)
+        )
+
+    async def events():
+        # Each event carries a JSON-encoded piece of the response text
+        async for text in chatbot.chat_stream(request.question):
+            yield f"data: {json.dumps(text)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@app.get("/api/articles", responses={200: {"model": ArticleResponse}})
 async def list_articles():
     """Get list of all available articles"""
     try:
-        articles = list_available_articles()
+        articles = await asyncio.to_thread(list_available_articles)
         
         if not articles:
-            return ArticleResponse(
-                success=True,
-                data={"articles": [], "message": "No articles found"}
-            )
+            return {
+                "success": True,
+                "data": {"articles": [], "message": "No articles found"}
+            }
         
-        return ArticleResponse(
-            success=True,
-            data={"articles": articles}
-        )
+        return {
+            "success": True,
+            "data": {"articles": articles}
+        }
     except Exception as e:
         raise HTTPException(
             status_code=500,
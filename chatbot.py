@@ -1,57 +1,555 @@
+import google.auth
+from google.auth.transport.requests import AuthorizedSession
 from google.cloud import bigquery
-from typing import Optional, List, Dict
+from requests.adapters import HTTPAdapter
+from typing import AsyncIterator, Deque, Optional, List, Dict, Set, Tuple
+from collections import Counter, OrderedDict, deque
+import asyncio
+import hashlib
+import html
+import itertools
 import json
 import os
+import re
+import tempfile
+import numpy as np
 import google.generativeai as genai
-from datetime import datetime
+import datetime
+
+try:
+    import faiss
+except ImportError:  # fall back to exact NumPy search
+    faiss = None
 
 # Configure Google AI
 GOOGLE_API_KEY = "YOUR_API_KEY"
-genai.configure(api_key=GOOGLE_API_KEY)
 
-# Initialize BigQuery
-client = bigquery.Client()
+# Shared BigQuery client, created by init_clients()
+BQ_POOL_SIZE = 64
+client: Optional[bigquery.Client] = None
 
-def chunk_text(text: str, chunk_size: int = 100) -> List[str]:
-    """Split text into chunks of specified size."""
-    return [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+def init_clients(pool_size: int = BQ_POOL_SIZE) -> bigquery.Client:
+    """Configure Google AI and create the shared BigQuery client.
 
-class ArticleChatbot:
+    The BigQuery client gets an HTTP connection pool of ``pool_size`` so that
+    concurrent queries reuse connections instead of opening new ones.
+    """
+    global client
+    # Leave the transport unset: sync clients default to gRPC (long-lived HTTP/2
+    # channels) and async clients to grpc_asyncio
+    genai.configure(api_key=GOOGLE_API_KEY)
+
+    credentials, project = google.auth.default(scopes=bigquery.Client.SCOPE)
+    session = AuthorizedSession(credentials)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+
+    client = bigquery.Client(project=project, credentials=credentials, _http=session)
+    return client
+
+def get_client() -> bigquery.Client:
+    """Return the shared BigQuery client, creating it on first use."""
+    if client is None:
+        return init_clients()
+    return client
+
+# In-process mirror of the article table: article_id -> row
+ARTICLE_REFRESH_INTERVAL = 300  # seconds
+_ARTICLES: Dict[str, dict] = {}
+_ARTICLES_LOADED = False  # True once the whole table has been mirrored
+
+def refresh_article_cache() -> int:
+    """Load every article from BigQuery into the in-process cache."""
+    global _ARTICLES, _ARTICLES_LOADED
+    try:
+        query = """
+        SELECT id, teaser_text, gemini_category, gemini_sub_category, title, full_text 
+        FROM `aimedia25mun-322.BiteNews.article_metadata_chatbox`
+        """
+
+        query_job = get_client().query(query)
+        _ARTICLES = {row['id']: dict(row.items()) for row in query_job}
+        _ARTICLES_LOADED = True
+        return len(_ARTICLES)
+    except Exception as e:
+        print(f"Error refreshing article cache: {str(e)}")
+        return 0
+
+# Per-article chunk embedding indexes, persisted across restarts
+INDEX_DIR = "/tmp/faiss"
+HNSW_NEIGHBORS = 32
+
+# Sent once as the model's system instruction rather than with every question
+INSTRUCTIONS = """You are a helpful AI assistant. You have access to both the article content and our conversation history.
+
+Please provide a brief, direct answer that:
+1. Answers the question in 1-2 sentences
+2. Uses any available information (article, conversation history, or general knowledge)
+3. Keeps the tone casual and natural
+4. Focuses on the most important information
+5. Don't mention where the information comes from"""
+
+# Messages kept in ArticleChatbot.conversation_history
+MAX_HISTORY = 6
+
+# Primed chat history per article: article_id -> (article text digest, history)
+INIT_ACKNOWLEDGEMENT = "Understood."
+_INIT_CACHE: Dict[str, Tuple[str, List[dict]]] = {}
+
+# Micro-batching of concurrent Gemini chat requests
+BATCH_MAX_SIZE = 16
+BATCH_MAX_WAIT = 0.02  # seconds
+
+# Semantic response cache: article_id -> LSH-bucketed question embeddings and responses
+EMBEDDING_MODEL = "models/text-embedding-004"
+EMBED_BATCH_SIZE = 100  # most texts the embedding API accepts per request
+SEM_CACHE_THRESHOLD = 0.92
+SEM_CACHE_MAXSIZE = 1024  # entries per article
+SEM_CACHE_MAX_ARTICLES = 64
+SEM_CACHE_LSH_BITS = 12
+SEM_CACHE_LSH_RADIUS = 2  # probe buckets whose signatures differ in at most this many bits
+_SEM_CACHE: "OrderedDict[str, _LSHCache]" = OrderedDict()
+
+_LSH_POWERS = 1 << np.arange(SEM_CACHE_LSH_BITS, dtype=np.int64)
+_LSH_PROBE_MASKS = [
+    sum(1 << bit for bit in bits)
+    for radius in range(SEM_CACHE_LSH_RADIUS + 1)
+    for bits in itertools.combinations(range(SEM_CACHE_LSH_BITS), radius)
+]
+
+def _normalize(embedding) -> np.ndarray:
+    """L2-normalize an embedding so dot products are cosine similarities."""
+    embedding = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(embedding)
+    return embedding / norm if norm else embedding
+
+def _embed_query(text: str) -> np.ndarray:
+    """Embed a user question for cosine lookups."""
+    result = genai.embed_content(model=EMBEDDING_MODEL, content=text, task_type="retrieval_query")
+    return _normalize(result["embedding"])
+
+async def _aembed_query(text: str) -> np.ndarray:
+    """Async version of _embed_query."""
+    result = await genai.embed_content_async(model=EMBEDDING_MODEL, content=text, task_type="retrieval_query")
+    return _normalize(result["embedding"])
+
+def _embed_documents(texts: List[str]) -> np.ndarray:
+    """Embed texts for retrieval; the SDK sends them in batch requests of up to 100."""
+    result = genai.embed_content(model=EMBEDDING_MODEL, content=texts, task_type="retrieval_document")
+    return np.vstack([_normalize(e) for e in result["embedding"]])
+
+async def _aembed_documents(texts: List[str]) -> np.ndarray:
+    """Async version of _embed_documents that sends the batches concurrently."""
+    results = await asyncio.gather(*[
+        genai.embed_content_async(
+            model=EMBEDDING_MODEL,
+            content=texts[i:i + EMBED_BATCH_SIZE],
+            task_type="retrieval_document"
+        )
+        for i in range(0, len(texts), EMBED_BATCH_SIZE)
+    ])
+    return np.vstack([_normalize(e) for result in results for e in result["embedding"]])
+
+class _LSHCache:
+    """Question embeddings and their responses, bucketed by locality-sensitive hash.
+
+    Each embedding is hashed to a SEM_CACHE_LSH_BITS-bit signature by the signs of
+    its projections onto random hyperplanes, so similar questions tend to share a
+    bucket. Lookups only score the buckets within SEM_CACHE_LSH_RADIUS bit flips of
+    the query's signature instead of every entry.
+    """
+
+    def __init__(self, dim: int, digest: str):
+        self.digest = digest  # article text the responses were generated from
+        self.planes = np.random.default_rng().standard_normal((dim, SEM_CACHE_LSH_BITS)).astype(np.float32)
+        self.buckets: Dict[int, Dict[int, Tuple[np.ndarray, str]]] = {}
+        self._order: "OrderedDict[int, int]" = OrderedDict()  # entry id -> signature, least recently used first
+        self._next_id = 0
+
+    def _signature(self, embedding: np.ndarray) -> int:
+        bits = (embedding @ self.planes) > 0
+        return int(bits @ _LSH_POWERS)
+
+    def lookup(self, embedding: np.ndarray) -> Optional[str]:
+        """Return the response to the most similar cached question above the threshold."""
+        signature = self._signature(embedding)
+        candidates = [
+            (entry_id, entry)
+            for mask in _LSH_PROBE_MASKS
+            for entry_id, entry in self.buckets.get(signature ^ mask, {}).items()
+        ]
+        if not candidates:
+            return None
+
+        sims = np.stack([e for _, (e, _) in candidates]) @ embedding
+        best = int(np.argmax(sims))
+        if sims[best] < SEM_CACHE_THRESHOLD:
+            return None
+
+        entry_id, (_, response) = candidates[best]
+        self._order.move_to_end(entry_id)
+        return response
+
+    def store(self, embedding: np.ndarray, response: str) -> None:
+        """Remember a response, evicting the least recently used entries past SEM_CACHE_MAXSIZE."""
+        signature = self._signature(embedding)
+        self.buckets.setdefault(signature, {})[self._next_id] = (embedding, response)
+        self._order[self._next_id] = signature
+        self._next_id += 1
+
+        while len(self._order) > SEM_CACHE_MAXSIZE:
+            old_id, old_signature = self._order.popitem(last=False)
+            bucket = self.buckets[old_signature]
+            del bucket[old_id]
+            if not bucket:
+                del self.buckets[old_signature]
+
+def _sem_cache_lookup(article_id: str, digest: str, embedding: np.ndarray) -> Optional[str]:
+    """Return a cached response for a similar question about this version of the article, if any."""
+    cache = _SEM_CACHE.get(article_id)
+    if cache is None or cache.digest != digest:
+        return None
+
+    _SEM_CACHE.move_to_end(article_id)
+    return cache.lookup(embedding)
+
+def _sem_cache_store(article_id: str, digest: str, embedding: np.ndarray, response: str) -> None:
+    """Remember a response to a question about the article.
+
+    Responses for an older version of the article text are dropped, and only the
+    SEM_CACHE_MAX_ARTICLES most recently used articles keep a cache.
+    """
+    cache = _SEM_CACHE.get(article_id)
+    if cache is None or cache.digest != digest:
+        cache = _SEM_CACHE[article_id] = _LSHCache(embedding.shape[0], digest)
+    _SEM_CACHE.move_to_end(article_id)
+    cache.store(embedding, response)
+
+    while len(_SEM_CACHE) > SEM_CACHE_MAX_ARTICLES:
+        _SEM_CACHE.popitem(last=False)
+
+_TOKEN_RE = re.compile(r"\w+")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+# Keywords the basic fallback responds to, by question kind
+_BASIC_KEYWORDS = {
+    'what': 'what', 'tell me about': 'what',
+    'when': 'when', 'date': 'when', 'time': 'when',
+    'who': 'who', 'author': 'who',
+    'summary': 'summary', 'overview': 'summary', 'about': 'summary',
+}
+# The lookahead reports overlapping matches too, like a substring test per keyword
+_BASIC_KEYWORD_RE = re.compile(
+    "(?=(" + "|".join(re.escape(k) for k in sorted(_BASIC_KEYWORDS, key=len, reverse=True)) + "))"
+)
+
+def _tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens."""
+    return _TOKEN_RE.findall(text.lower())
+
+def chunk_text(text: str, target_tokens: int = 512, overlap: int = 64) -> List[str]:
+    """Split text into sentence-aligned chunks of about target_tokens words.
+
+    Consecutive chunks share up to ``overlap`` words of whole sentences.
+    HTML entities are decoded here, once, so chunks are ready to use as is.
+    """
+    # Sentences longer than a chunk (e.g. text without punctuation) are cut by words
+    pieces: List[Tuple[str, int]] = []
+    for sentence in _SENTENCE_END_RE.split(html.unescape(text).strip()):
+        words = sentence.split()
+        for i in range(0, len(words), target_tokens):
+            piece = words[i:i + target_tokens]
+            pieces.append((" ".join(piece), len(piece)))
+
+    chunks = []
+    current: List[Tuple[str, int]] = []
+    current_tokens = 0
+
+    for sentence, n_tokens in pieces:
+        if current and current_tokens + n_tokens > target_tokens:
+            chunks.append(" ".join(s for s, _ in current))
+
+            # Carry the trailing sentences over into the next chunk
+            carried: List[Tuple[str, int]] = []
+            carried_tokens = 0
+            for prev, prev_tokens in reversed(current):
+                if carried_tokens + prev_tokens > overlap:
+                    break
+                carried.insert(0, (prev, prev_tokens))
+                carried_tokens += prev_tokens
+
+            # Drop the oldest carried sentences until the incoming one fits
+            while carried and carried_tokens + n_tokens > target_tokens:
+                carried_tokens -= carried.pop(0)[1]
+            current, current_tokens = carried, carried_tokens
+
+        current.append((sentence, n_tokens))
+        current_tokens += n_tokens
+
+    if current:
+        chunks.append(" ".join(s for s, _ in current))
+    return chunks
+
+class GeminiBatcher:
+    """Coalesce chat turns that arrive close together and send them as one batch.
+
+    A turn that arrives while nothing else is queued is sent right away. Under a
+    burst, requests are collected for up to ``max_wait`` seconds or until
+    ``max_batch`` are pending. Gemini has no batch endpoint for chat turns, so a
+    batch is sent as concurrent requests multiplexed over the client's HTTP/2
+    channel.
+    """
+
+    def __init__(self, max_batch: int = BATCH_MAX_SIZE, max_wait: float = BATCH_MAX_WAIT):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._in_flight: Set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        """Start collecting batches on the running event loop."""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop collecting batches; queued and later messages are sent directly."""
+        if self._task is None:
+            return
+
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+        pending = []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        if pending:
+            self._dispatch(pending)
+
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    async def send_message(self, chat, prompt: str):
+        """Send a message on a chat session as part of the next batch."""
+        if self._task is None:
+            return await chat.send_message_async(prompt)
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((chat, prompt, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        getter = None
+        batch = []
+        try:
+            while True:
+                # A get left pending by the previous batch is reused so no message is lost
+                if getter is None:
+                    getter = asyncio.ensure_future(self._queue.get())
+                batch = [await getter]
+                getter = None
+
+                # Only hold the batch open when other turns are already waiting
+                if not self._queue.empty():
+                    deadline = loop.time() + self.max_wait
+                    while len(batch) < self.max_batch:
+                        remaining = deadline - loop.time()
+                        if remaining <= 0:
+                            break
+                        getter = asyncio.ensure_future(self._queue.get())
+                        done, _ = await asyncio.wait({getter}, timeout=remaining)
+                        if not done:
+                            break
+                        batch.append(getter.result())
+                        getter = None
+
+                self._dispatch(batch)
+                batch = []
+        except asyncio.CancelledError:
+            # Send whatever was already taken off the queue before stopping
+            if getter is not None:
+                if getter.done() and not getter.cancelled():
+                    batch.append(getter.result())
+                else:
+                    getter.cancel()
+            if batch:
+                self._dispatch(batch)
+            raise
+
+    def _dispatch(self, batch) -> None:
+        """Send a batch in the background so the next one can start collecting."""
+        task = asyncio.create_task(self._send(batch))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _send(self, batch) -> None:
+        results = await asyncio.gather(
+            *[chat.send_message_async(prompt) for chat, prompt, _ in batch],
+            return_exceptions=True
+        )
+        for (_, _, future), result in zip(batch, results):
+            if future.done():  # the caller went away
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+batcher = GeminiBatcher()
+
+class ArticleContext:
     def __init__(self, article_id: str):
-        """Initialize the chatbot with a specific article."""
+        """Load an article once so it can be shared by many chat sessions."""
         self.article_id = article_id
-        self.article_data = self._get_article_data()
-        self.model = genai.GenerativeModel('gemini_model') # chose the available Gemini model
-        self.chat = self.model.start_chat(history=[])
-        
-        # Parse article data
+        self._parse_article(self._get_article_data())
+        self._build_keyword_index()
+
+        # Embedding index over the chunks, or None if embeddings are unavailable
+        self.index = self._load_index()
+
+    @classmethod
+    async def create(cls, article_id: str) -> "ArticleContext":
+        """Async constructor; the chunk embedding requests overlap building the TF-IDF index."""
+        self = cls.__new__(cls)
+        self.article_id = article_id
+        self._parse_article(await asyncio.to_thread(self._get_article_data))
+
+        _, self.index = await asyncio.gather(
+            asyncio.to_thread(self._build_keyword_index),
+            self._aload_index()
+        )
+        return self
+
+    def _parse_article(self, article_data: dict) -> None:
+        """Parse article data into text chunks."""
+        self.article_data = article_data
         self.article_text = self.article_data.get('full_text', '')
+        self.digest = hashlib.sha256(self.article_text.encode("utf-8")).hexdigest()[:16]
         self.chunks = chunk_text(self.article_text)
-        
-        # Store conversation history
-        self.conversation_history = []
-        
-        # Initialize chat with article context
-        self._initialize_chat()
-    
-    def _initialize_chat(self):
-        """Initialize the chat with article context."""
-        # Get the most relevant context about the article
-        context = self.get_relevant_context("What is this article about?")
-        
-        # Create a focused initial prompt
-        initial_prompt = f"""You are an AI assistant helping users understand this article. Here is the relevant content:
 
-{context}
+    def _build_keyword_index(self) -> None:
+        """Build the TF-IDF matrix (chunks x vocabulary) with L2-normalized rows."""
+        chunk_counts = [Counter(_tokenize(chunk)) for chunk in self.chunks]
+        self.vocabulary: Dict[str, int] = {}
+        for counts in chunk_counts:
+            for token in counts:
+                self.vocabulary.setdefault(token, len(self.vocabulary))
+
+        tf = np.zeros((len(self.chunks), len(self.vocabulary)), dtype=np.float32)
+        for i, counts in enumerate(chunk_counts):
+            for token, count in counts.items():
+                tf[i, self.vocabulary[token]] = count
+
+        doc_freq = np.count_nonzero(tf, axis=0)
+        self.idf = np.log((1 + len(self.chunks)) / (1 + doc_freq)).astype(np.float32) + 1
+        tfidf = tf * self.idf
+        norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+        self.tfidf = tfidf / np.where(norms > 0, norms, 1)
+
+    def _index_path(self) -> str:
+        return os.path.join(INDEX_DIR, f"{self.article_id}-{self.digest}.index")
+
+    def _read_index(self):
+        """Return the persisted embedding index for this article text, if any.
+
+        An unreadable or mismatched index file is ignored so the index gets rebuilt.
+        """
+        path = self._index_path()
+        if faiss is None or not os.path.exists(path):
+            return None
+
+        try:
+            index = faiss.read_index(path)
+        except Exception as e:
+            print(f"Error reading article index {path}: {str(e)}")
+            return None
+
+        if index.ntotal != len(self.chunks):
+            print(f"Error reading article index {path}: expected {len(self.chunks)} vectors, found {index.ntotal}")
+            return None
+        return index
+
+    def _build_index(self, embeddings: np.ndarray):
+        """Index the chunk embeddings, persisting the index when FAISS is available."""
+        if faiss is None:
+            return embeddings
+
+        # Inner product on normalized vectors is cosine similarity
+        index = faiss.IndexHNSWFlat(embeddings.shape[1], HNSW_NEIGHBORS, faiss.METRIC_INNER_PRODUCT)
+        index.add(embeddings)
+        self._write_index(index)
+        return index
+
+    def _write_index(self, index) -> None:
+        """Persist the index, atomically so other workers never read a partial file."""
+        path = self._index_path()
+        tmp_path = None
+        try:
+            os.makedirs(INDEX_DIR, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=INDEX_DIR, suffix=".tmp")
+            os.close(fd)
+            faiss.write_index(index, tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            # The in-memory index still works; it just won't be reused after a restart
+            print(f"Error saving article index {path}: {str(e)}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _load_index(self):
+        """Load this article's chunk embedding index from disk, or build it."""
+        if not self.chunks:
+            return None
+
+        index = self._read_index()
+        if index is not None:
+            return index
+
+        try:
+            embeddings = _embed_documents(self.chunks)
+        except Exception as e:
+            print(f"Error embedding article chunks: {str(e)}")
+            return None
+        return self._build_index(embeddings)
+
+    async def _aload_index(self):
+        """Async version of _load_index."""
+        if not self.chunks:
+            return None
+
+        index = await asyncio.to_thread(self._read_index)
+        if index is not None:
+            return index
+
+        try:
+            embeddings = await _aembed_documents(self.chunks)
+        except Exception as e:
+            print(f"Error embedding article chunks: {str(e)}")
+            return None
+        return await asyncio.to_thread(self._build_index, embeddings)
+
+    def search_chunks(self, query_embedding: np.ndarray, top_k: int) -> List[int]:
+        """Return the indexes of the top_k chunks closest to the query embedding."""
+        if isinstance(self.index, np.ndarray):
+            scores = self.index @ query_embedding
+            k = min(top_k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            return top[np.argsort(-scores[top])].tolist()
+
+        _, ids = self.index.search(query_embedding[None, :], top_k)
+        return [int(i) for i in ids[0] if i >= 0]
 
-Please help answer questions about this article. Use both the article content and our conversation history to provide relevant answers."""
-        
-        # Send initial context to the chat
-        self.chat.send_message(initial_prompt)
-        self.conversation_history.append(("system", initial_prompt))
-    
     def _get_article_data(self) -> dict:
-        """Retrieve article data from BigQuery."""
+        """Retrieve article data from the article cache, falling back to BigQuery."""
+        cached = _ARTICLES.get(self.article_id)
+        if cached is not None:
+            return cached
+
         try:
             query = """
             SELECT id, teaser_text, gemini_category, gemini_sub_category, title, full_text 
@@ -65,7 +563,7 @@ Please help answer questions about this article. Use both the article content an
                 ]
             )
             
-            query_job = client.query(query, job_config=job_config)
+            query_job = get_client().query(query, job_config=job_config)
             results = list(query_job)
             
             if not results:
@@ -73,72 +571,213 @@ Please help answer questions about this article. Use both the article content an
                 
             # Convert row to dict
             article_data = dict(results[0].items())
+            _ARTICLES[self.article_id] = article_data
             return article_data
             
         except Exception as e:
             raise ValueError(f"Error retrieving article: {str(e)}")
+
+class ArticleChatbot:
+    def __init__(self, article_id: str, context: Optional[ArticleContext] = None):
+        """Initialize the chatbot with a specific article.
+
+        Pass an already loaded ``context`` to skip fetching and chunking the article.
+        """
+        self.article_id = article_id
+        self.article_context = context or ArticleContext(article_id)
+        self.article_data = self.article_context.article_data
+        self.model = genai.GenerativeModel('gemini_model', system_instruction=INSTRUCTIONS) # chose the available Gemini model
+        
+        self.article_text = self.article_context.article_text
+        self.chunks = self.article_context.chunks
+        
+        # Store recent conversation history; only the last few messages are ever read
+        self.conversation_history: Deque[Tuple[str, str]] = deque(maxlen=MAX_HISTORY)
+        # Tokens of each message in conversation_history, tokenized once on arrival
+        self._history_tokens: Deque[List[str]] = deque(maxlen=MAX_HISTORY)
+        
+        # Initialize chat with article context
+        self._initialize_chat()
+
+    @classmethod
+    async def create(cls, article_id: str, context: Optional[ArticleContext] = None) -> "ArticleChatbot":
+        """Async constructor that loads the article without blocking the event loop."""
+        if context is None:
+            context = await ArticleContext.create(article_id)
+        return cls(article_id, context=context)
+    
+    def _initialize_chat(self):
+        """Initialize the chat with article context."""
+        # The primed history only depends on the article, so build it once per article text
+        cached = _INIT_CACHE.get(self.article_id)
+        if cached is not None and cached[0] == self.article_context.digest:
+            history = cached[1]
+        else:
+            # Get the most relevant context about the article
+            context = self.get_relevant_context("What is this article about?")
+            
+            # Create a focused initial prompt
+            initial_prompt = f"""You are an AI assistant helping users understand this article. Here is the relevant content:
+
+{context}
+
+Please help answer questions about this article. Use both the article content and our conversation history to provide relevant answers."""
+
+            history = [
+                {"role": "user", "parts": [initial_prompt]},
+                {"role": "model", "parts": [INIT_ACKNOWLEDGEMENT]},
+            ]
+            _INIT_CACHE[self.article_id] = (self.article_context.digest, history)
+        
+        # Start the chat already primed with the article context. The priming prompt
+        # stays out of conversation_history: its article text would otherwise swamp
+        # the user's words in keyword search.
+        self.chat = self.model.start_chat(history=history)
     
-    def get_relevant_context(self, query: str, top_k: int = 3) -> str:
-        """Get relevant context from the article based on the query and conversation history."""
-        query_terms = query.lower().split()
-        relevant_chunks = []
+    def get_relevant_context(self, query: str, top_k: int = 3, query_embedding: Optional[np.ndarray] = None) -> str:
+        """Get relevant context from the article based on the query and conversation history.
 
-        # Add conversation history to query terms
-        for _, message in self.conversation_history[-3:]:  # Look at last 3 messages
-            query_terms.extend(message.lower().split())
-
-        for chunk in self.chunks:
-            chunk_lower = chunk.lower()
-            if any(term in chunk_lower for term in query_terms):
-                # Clean up the text
-                cleaned_chunk = chunk.replace('&quot;', '"').strip()
-                relevant_chunks.append(cleaned_chunk)
-                if len(relevant_chunks) >= top_k:
-                    break
+        Chunks are retrieved by embedding similarity when ``query_embedding`` is given
+        and the article has an embedding index, and by TF-IDF keyword scoring otherwise.
+        """
+        if query_embedding is not None and self.article_context.index is not None:
+            top = self.article_context.search_chunks(query_embedding, top_k)
+        else:
+            top = self._keyword_search(query, top_k)
+
+        relevant_chunks = [self.chunks[i] for i in top]
 
         if not relevant_chunks:
             return "No specific information found in the article."
 
         # Return the most relevant chunks
         return " ".join(relevant_chunks)
+
+    def _keyword_search(self, query: str, top_k: int) -> List[int]:
+        """Return the indexes of the top_k chunks by TF-IDF score."""
+        query_terms = Counter(_tokenize(query))
+
+        # Add conversation history to query terms
+        for tokens in list(self._history_tokens)[-3:]:  # Look at last 3 messages
+            query_terms.update(tokens)
+
+        # Score chunks against the query terms found in the article
+        vocabulary = self.article_context.vocabulary
+        matched = [(vocabulary[term], count) for term, count in query_terms.items() if term in vocabulary]
+        if not matched:
+            return []
+
+        columns, counts = map(list, zip(*matched))
+        weights = np.asarray(counts, dtype=np.float32) * self.article_context.idf[columns]
+        scores = self.article_context.tfidf[:, columns] @ weights
+
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [int(i) for i in top if scores[i] > 0]
     
-    def chat_with_article(self, user_input: str) -> str:
-        """Process user input and return a response based on article content and conversation history."""
-        try:
-            # Get relevant context considering conversation history
-            context = self.get_relevant_context(user_input)
-            
-            # Create prompt that includes context and conversation history
-            conversation_context = "\n".join([f"{role}: {msg}" for role, msg in self.conversation_history[-3:]])
-            
-            prompt = f"""You are a helpful AI assistant. You have access to both the article content and our conversation history.
+    def _build_prompt(self, user_input: str, embedding: Optional[np.ndarray] = None) -> str:
+        """Create the user turn; instructions and history are already in the chat session."""
+        # Get relevant context considering conversation history
+        context = self.get_relevant_context(user_input, query_embedding=embedding)
+        return f"Article snippet: {context}\nQuestion: {user_input}"
 
-Previous conversation:
-{conversation_context}
+    def _add_message(self, role: str, message: str) -> None:
+        """Append a message to the conversation history."""
+        self.conversation_history.append((role, message))
+        self._history_tokens.append(_tokenize(message))
 
-Article content: {context}
+    def _record_turn(self, user_input: str, response: str, embedding: Optional[np.ndarray] = None) -> None:
+        """Update conversation history and the semantic cache with a question and its answer."""
+        self._add_message("user", user_input)
+        self._add_message("assistant", response)
 
-Question: {user_input}
+        if embedding is not None:
+            _sem_cache_store(self.article_id, self.article_context.digest, embedding, response)
 
-Please provide a brief, direct answer that:
-1. Answers the question in 1-2 sentences
-2. Uses any available information (article, conversation history, or general knowledge)
-3. Keeps the tone casual and natural
-4. Focuses on the most important information
-5. Don't mention where the information comes from
+    def _cached_answer(self, user_input: str, embedding: Optional[np.ndarray]) -> Optional[str]:
+        """Answer from the semantic cache when a similar question was already asked."""
+        if embedding is None:
+            return None
+
+        cached = _sem_cache_lookup(self.article_id, self.article_context.digest, embedding)
+        if cached is not None:
+            self._record_turn(user_input, cached)
+            # The prompt relies on the chat session's history, so the model must see this turn too
+            self.chat.history = self.chat.history + [
+                {"role": "user", "parts": [user_input]},
+                {"role": "model", "parts": [cached]},
+            ]
+        return cached
+
+    def chat_with_article(self, user_input: str) -> str:
+        """Process user input and return a response based on article content and conversation history."""
+        try:
+            embedding = _embed_query(user_input)
+        except Exception:
+            embedding = None
+
+        cached = self._cached_answer(user_input, embedding)
+        if cached is not None:
+            return cached
 
-Your response:"""
+        try:
+            prompt = self._build_prompt(user_input, embedding)
             
             # Get response from the chat session
             response = self.chat.send_message(prompt)
             
-            # Update conversation history
-            self.conversation_history.append(("user", user_input))
-            self.conversation_history.append(("assistant", response.text))
-            
+            self._record_turn(user_input, response.text, embedding)
+            return response.text
+        except Exception as e:
+            return self._handle_basic_response(user_input)
+
+    async def achat_with_article(self, user_input: str) -> str:
+        """Async version of chat_with_article that doesn't block the event loop."""
+        try:
+            embedding = await _aembed_query(user_input)
+        except Exception:
+            embedding = None
+
+        cached = self._cached_answer(user_input, embedding)
+        if cached is not None:
+            return cached
+
+        try:
+            prompt = self._build_prompt(user_input, embedding)
+            response = await batcher.send_message(self.chat, prompt)
+
+            self._record_turn(user_input, response.text, embedding)
             return response.text
         except Exception as e:
             return self._handle_basic_response(user_input)
+
+    async def chat_stream(self, user_input: str) -> AsyncIterator[str]:
+        """Like achat_with_article, but yield the response text as it is generated."""
+        try:
+            embedding = await _aembed_query(user_input)
+        except Exception:
+            embedding = None
+
+        cached = self._cached_answer(user_input, embedding)
+        if cached is not None:
+            yield cached
+            return
+
+        parts = []
+        try:
+            prompt = self._build_prompt(user_input, embedding)
+            response = await self.chat.send_message_async(prompt, stream=True)
+            async for chunk in response:
+                parts.append(chunk.text)
+                yield chunk.text
+        except Exception as e:
+            # Only fall back if nothing has been sent yet
+            if not parts:
+                yield self._handle_basic_response(user_input)
+            return
+
+        self._record_turn(user_input, "".join(parts), embedding)
     
     def _handle_when_question(self) -> str:
         """Handle questions about when the article was published."""
@@ -148,7 +787,7 @@ Your response:"""
             
             if date:
                 # Format the date nicely
-                date_obj = datetime.strptime(date, '%Y-%m-%d')
+                date_obj = datetime.date.fromisoformat(date) if isinstance(date, str) else date
                 formatted_date = date_obj.strftime('%B %d, %Y')
                 return f"Published on {formatted_date}"
             else:
@@ -158,15 +797,16 @@ Your response:"""
 
     def _handle_basic_response(self, user_input: str) -> str:
         """Fallback method for basic responses when Google AI is not available."""
-        user_input_lower = user_input.lower()
+        # Find every keyword in a single pass over the input
+        kinds = {_BASIC_KEYWORDS[m.group(1)] for m in _BASIC_KEYWORD_RE.finditer(user_input.lower())}
 
-        if any(word in user_input_lower for word in ['what', 'tell me about']):
+        if 'what' in kinds:
             return self._handle_what_question(user_input)
-        elif any(word in user_input_lower for word in ['when', 'date', 'time']):
+        elif 'when' in kinds:
             return self._handle_when_question()
-        elif any(word in user_input_lower for word in ['who', 'author']):
+        elif 'who' in kinds:
             return self._handle_who_question()
-        elif any(word in user_input_lower for word in ['summary', 'overview', 'about']):
+        elif 'summary' in kinds:
             return self._handle_summary_question()
         else:
             return self._handle_general_question(user_input)
@@ -192,37 +832,39 @@ Your response:"""
         context = self.get_relevant_context(question)
         return context[:100] + '...' if len(context) > 100 else context
 
+def _article_summary(article_data: dict) -> dict:
+    """Shape an article row for the article listing."""
+    return {
+        'id': article_data['id'],
+        'title': article_data.get('title', 'Untitled'),
+        'summary': article_data.get('teaser_text', 'No summary available'),
+        'categories': {
+            'main': article_data.get('gemini_category', ''),
+            'sub': article_data.get('gemini_sub_category', '')
+        }
+    }
+
 def list_available_articles() -> List[dict]:
-    """List all available articles in BigQuery."""
+    """List all available articles, from the article cache when it has been loaded."""
+    if _ARTICLES_LOADED:
+        return [_article_summary(article_data) for article_data in _ARTICLES.values()]
+
     try:
         query = """
-        SELECT id, teaser_text, gemini_category, gemini_sub_category, title, full_text 
+        SELECT id, teaser_text, gemini_category, gemini_sub_category, title
         FROM `aimedia25mun-322.BiteNews.article_metadata_chatbox`
-      
         """
         
-        query_job = client.query(query)
-        results = list(query_job)
-        
-        articles = []
-        for row in results:
-            article_data = dict(row.items())
-            articles.append({
-                'id': article_data['id'],
-                'title': article_data.get('title', 'Untitled'),
-                'summary': article_data.get('teaser_text', 'No summary available'),
-                'categories': {
-                    'main': article_data.get('gemini_category', ''),
-                    'sub': article_data.get('gemini_sub_category', '')
-                }
-            })
-        
-        return articles
+        query_job = get_client().query(query)
+        return [_article_summary(dict(row.items())) for row in query_job]
     except Exception as e:
         print(f"Error listing articles: {str(e)}")
         return []
 
 def main():
+    if client is None:
+        init_clients()
+
     # List available articles
     print("\n=== Starting Article Chatbot ===")
     print("Available articles:")